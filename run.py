@@ -1,5 +1,18 @@
+import argparse
 import uvicorn
 
 if __name__ == "__main__":
-    from src.main import app
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the url-tracker server.")
+    parser.add_argument(
+        "--bulk-load",
+        metavar="CSV",
+        help="load tracking rows from a CSV file into the database and exit"
+    )
+    args = parser.parse_args()
+
+    if args.bulk_load:
+        from src.main import bulk_load
+        print(f"Loaded {bulk_load(args.bulk_load)} locations")
+    else:
+        from src.main import app
+        uvicorn.run(app, host="0.0.0.0", port=8000)
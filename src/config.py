@@ -0,0 +1,13 @@
+import functools
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+@functools.lru_cache(maxsize=1)
+def load_config(config_file='config.yml'):
+    """Load configuration from YAML file, parsed once per process."""
+    with open(config_file, 'r') as file:
+        return yaml.load(file, Loader=SafeLoader)
@@ -1,27 +1,29 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.templating import Jinja2Templates
+from fastapi.responses import Response
+from jinja2 import FileSystemBytecodeCache
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 import sqlite3
-import yaml
-import requests
+import csv
+import hashlib
+import ipaddress
+import socket
+import httpx
 from datetime import datetime
 import time
 from urllib.parse import urlparse
+from itertools import islice
 import logging
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 import os
-from starlette.middleware.sessions import SessionMiddleware
-from src.security import verify_frontend_request, init_session, SECRET_KEY
-
-def load_config(config_file='config.yml'):
-    """Load configuration from YAML file."""
-    with open(config_file, 'r') as file:
-        return yaml.safe_load(file)
+from src.config import load_config
+from src.security import verify_frontend_request, init_session
 
 # Load configuration
 config = load_config()
@@ -48,37 +50,177 @@ logging.getLogger('apscheduler').setLevel(getattr(logging, config['logging'].get
 # Initialize scheduler
 scheduler = AsyncIOScheduler()
 
+# Connection settings applied to every sqlite connection
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+    'PRAGMA mmap_size=268435456',
+)
+
+def connect():
+    """Open a sqlite connection to the tracking database with tuned PRAGMAs.
+
+    The connection is in autocommit mode and may be shared across threads;
+    writers open transactions explicitly with BEGIN. Statements are passed as
+    module-level SQL constants so they hit the per-connection statement cache.
+    """
+    conn = sqlite3.connect(
+        config['database']['path'],
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=256
+    )
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# Tracking table without indexes, so bulk loads can defer index maintenance
+CREATE_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS tracking (
+    url TEXT,
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    geom_lat DOUBLE,
+    geom_lon DOUBLE,
+    country TEXT,
+    city TEXT,
+    isp TEXT,
+    org TEXT,
+    as_number TEXT,
+    dedup_key BLOB
+)
+'''
+
+# Locations are deduplicated on a hash of their identifying fields
+CREATE_INDEXES_SQL = (
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_dedup_key ON tracking(dedup_key)',
+    'CREATE INDEX IF NOT EXISTS idx_url_detected ON tracking(url, detected_at)',
+)
+
+DROP_INDEXES_SQL = (
+    'DROP INDEX IF EXISTS idx_dedup_key',
+    'DROP INDEX IF EXISTS idx_url_detected',
+)
+
+# Keep the earliest detection for every dedup_key, oldest rowid breaking ties
+DELETE_DUPLICATES_SQL = '''
+DELETE FROM tracking WHERE rowid IN (
+    SELECT rowid FROM (
+        SELECT rowid, ROW_NUMBER() OVER (
+            PARTITION BY dedup_key ORDER BY detected_at, rowid
+        ) AS position
+        FROM tracking
+    )
+    WHERE position > 1
+)
+'''
+
+def create_table(conn):
+    """Create the tracking table if it doesn't exist."""
+    conn.execute(CREATE_TABLE_SQL)
+
+def create_indexes(conn):
+    """Create the tracking indexes if they don't exist."""
+    for sql in CREATE_INDEXES_SQL:
+        conn.execute(sql)
+
+def drop_indexes(conn):
+    """Drop the tracking indexes, e.g. ahead of a bulk load."""
+    for sql in DROP_INDEXES_SQL:
+        conn.execute(sql)
+
+def dedup_key(url, lat, lon, country, city, isp, org, as_number):
+    """Hash the identifying fields of a location into a 16-byte dedup key.
+
+    Coordinates are hashed as floats and empty text as missing, so values from
+    ip-api.com, sqlite and CSV files produce the same key.
+    """
+    lat, lon = (None if value in (None, '') else float(value) for value in (lat, lon))
+    country, city, isp, org, as_number = (
+        value or None for value in (country, city, isp, org, as_number)
+    )
+    return hashlib.blake2b(
+        f"{url}|{lat}|{lon}|{country}|{city}|{isp}|{org}|{as_number}".encode(),
+        digest_size=16
+    ).digest()
+
+def migrate_schema(conn):
+    """Rebuild a tracking table created with an older schema.
+
+    Older tables either lack dedup_key and carry a multi-column UNIQUE
+    constraint, or declare dedup_key as a UNIQUE column. Both come with an
+    automatic index that can only be removed by rebuilding the table. Rows
+    sharing a dedup_key are reduced to the earliest detection, and the number
+    of removed rows is logged.
+    """
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(tracking)')]
+    autoindexes = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tracking' "
+        "AND name LIKE 'sqlite_autoindex_%'"
+    ).fetchall()
+    if not columns or ('dedup_key' in columns and not autoindexes):
+        return
+    logging.info("Migrating tracking table to the current schema")
+    conn.create_function('dedup_key', 8, dedup_key, deterministic=True)
+    with conn:
+        conn.execute('BEGIN')
+        conn.execute('ALTER TABLE tracking RENAME TO tracking_legacy')
+        create_table(conn)
+        conn.execute('''
+        INSERT INTO tracking (
+            url, detected_at, geom_lat, geom_lon,
+            country, city, isp, org, as_number, dedup_key
+        )
+        SELECT url, detected_at, geom_lat, geom_lon,
+            country, city, isp, org, as_number,
+            dedup_key(url, geom_lat, geom_lon, country, city, isp, org, as_number)
+        FROM tracking_legacy ORDER BY rowid
+        ''')
+        conn.execute('DROP TABLE tracking_legacy')
+        # The old multi-column UNIQUE treated NULLs as distinct, so it allowed
+        # repeated rows for a location with a missing field; the key collapses them
+        removed = conn.execute(DELETE_DUPLICATES_SQL).rowcount
+    if removed:
+        logging.warning(f"Removed {removed} duplicate locations while migrating the tracking table")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events."""
-    # Initialize database
-    conn = sqlite3.connect(config['database']['path'])
-    cursor = conn.cursor()
+    # Thread pool for blocking sqlite calls
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=4))
+    # Separate thread pool for DNS lookups
+    app.state.dns_executor = ThreadPoolExecutor(max_workers=DNS_WORKERS, thread_name_prefix='dns')
     
-    # Create tracking table if it doesn't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS tracking (
-        url TEXT,
-        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        geom_lat DOUBLE,
-        geom_lon DOUBLE,
-        country TEXT,
-        city TEXT,
-        isp TEXT,
-        org TEXT,
-        as_number TEXT,
-        UNIQUE(url, geom_lat, geom_lon, country, city, isp, org, as_number)
-    )
-    ''')
+    # Open the long-lived database connection used for schema setup and writes
+    app.state.db = connect()
     
-    # Create index if it doesn't exist
-    cursor.execute('''
-    CREATE INDEX IF NOT EXISTS idx_url_detected 
-    ON tracking(url, detected_at)
-    ''')
+    # Create tracking table and indexes if they don't exist, migrating older schemas
+    migrate_schema(app.state.db)
+    create_table(app.state.db)
+    create_indexes(app.state.db)
     
-    conn.commit()
-    conn.close()
+    # Readers get their own connection so WAL only shows them committed rows
+    app.state.read_db = connect()
+    
+    # Single writer task draining rows queued by the tracking job
+    app.state.queue = asyncio.Queue()
+    app.state.writer = asyncio.create_task(db_writer_loop(app.state.queue))
+    
+    # In-flight fetch tasks started by the tracking job
+    app.state.fetches = set()
+    app.state.fetch_sem = asyncio.Semaphore(config['server'].get('concurrency', 10))
+    
+    # Shared HTTP client, keeping connections alive across job runs
+    app.state.client = httpx.AsyncClient(
+        http2=True,
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    )
+    
+    # Compile templates up front so the first page request doesn't pay for it
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
     
     scheduler.add_job(
         track_urls_job,
@@ -86,7 +228,9 @@ async def lifespan(app: FastAPI):
         id='url-tracker-job',
         name='url-tracker-job',
         replace_existing=False,
-        max_instances=1,
+        # The job only starts a fetch task and returns, so overlap is limited by
+        # MAX_FETCHES instead of max_instances; coalesce still folds runs missed
+        # while the loop was busy or suspended into a single tick
         coalesce=True,
         next_run_time=datetime.now() # run immediately (on startup)
     )
@@ -96,20 +240,19 @@ async def lifespan(app: FastAPI):
     yield
     
     scheduler.shutdown()
+    # Let running fetches queue their rows before the writer gets the sentinel
+    await asyncio.gather(*app.state.fetches, return_exceptions=True)
+    await app.state.queue.put(None)
+    await app.state.writer
+    await app.state.client.aclose()
+    # Don't wait on lookups stuck in the resolver
+    app.state.dns_executor.shutdown(wait=False, cancel_futures=True)
+    app.state.read_db.close()
+    app.state.db.close()
 
 # Update FastAPI app to use lifespan
 app = FastAPI(lifespan=lifespan)
 
-# Add session middleware
-app.add_middleware(
-    SessionMiddleware,
-    secret_key=SECRET_KEY,
-    session_cookie="session",
-    max_age=3600,  # 1 hour
-    same_site="strict",
-    https_only=True
-)
-
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -119,98 +262,356 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure templates directory
+# Configure templates directory, caching compiled templates on disk
 templates = Jinja2Templates(directory="src/pages")
+jinja_cache_dir = data_dir / 'jinja_cache'
+jinja_cache_dir.mkdir(parents=False, exist_ok=True)
+templates.env.bytecode_cache = FileSystemBytecodeCache(directory=str(jinja_cache_dir))
+
+# ip-api.com accepts at most 100 queries per batch request
+BATCH_SIZE = 100
+BATCH_FIELDS = 'status,lat,lon,country,city,isp,org,as'
+
+# Cache of successful lookups: domain -> (monotonic timestamp, location)
+GEO_CACHE_TTL = config['server'].get('geo_cache_ttl', 3600)
+_geo_cache: dict[str, tuple[float, dict]] = {}
+
+def get_cached_location(domain):
+    """Return the cached location for a domain if it has not expired."""
+    hit = _geo_cache.get(domain)
+    if hit and time.monotonic() - hit[0] < GEO_CACHE_TTL:
+        return hit[1]
+    return None
+
+def cache_location(domain, location):
+    """Store a successful lookup in the cache."""
+    if location:
+        _geo_cache[domain] = (time.monotonic(), location)
+
+def parse_location(data):
+    """Extract location fields from an ip-api.com response entry."""
+    if data.get('status') != 'success':
+        return None
+    return {
+        'lat': data.get('lat'),
+        'lon': data.get('lon'),
+        'country': data.get('country'),
+        'city': data.get('city'),
+        'isp': data.get('isp'),
+        'org': data.get('org'),
+        'as': data.get('as')
+    }
 
 async def locate_domain(domain):
-    """Get location data from ip-api.com."""
+    """Get location data for a single domain from ip-api.com."""
+    cached = get_cached_location(domain)
+    if cached:
+        return cached
     try:
-        response = requests.get(f'http://ip-api.com/json/{domain}')
+        response = await app.state.client.get(f'http://ip-api.com/json/{domain}')
         if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                return {
-                    'lat': data.get('lat'),
-                    'lon': data.get('lon'),
-                    'country': data.get('country'),
-                    'city': data.get('city'),
-                    'isp': data.get('isp'),
-                    'org': data.get('org'),
-                    'as': data.get('as')
-                }
+            location = parse_location(response.json())
+            cache_location(domain, location)
+            return location
     except Exception as e:
         logging.error(f"Error fetching location for {domain}: {str(e)}")
         return None
 
+# Hostname lookups for the batch endpoint, bounded so a bad name falls back quickly
+DNS_TIMEOUT = config['server'].get('dns_timeout', 2)
+DNS_WORKERS = 8
+
+async def resolve_domain(domain):
+    """Resolve a domain to an IPv4 address, returning None if it can't be resolved."""
+    try:
+        ipaddress.ip_address(domain)
+        return domain
+    except ValueError:
+        pass
+    try:
+        # Lookups run on a dedicated pool so slow DNS can't starve the sqlite threads.
+        # IPv4 only, matching the address ip-api.com picks when it resolves a name.
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(
+                app.state.dns_executor, socket.getaddrinfo,
+                domain, None, socket.AF_INET, socket.SOCK_STREAM
+            ),
+            DNS_TIMEOUT
+        )
+        return infos[0][4][0]
+    except (OSError, asyncio.TimeoutError) as e:
+        logging.warning(f"Could not resolve {domain}: {str(e) or 'timed out'}")
+        return None
+
+async def locate_domains(domains):
+    """Get location data for up to BATCH_SIZE domains in one ip-api.com request.
+
+    The batch endpoint only accepts IP addresses, so hostnames are resolved
+    first. Domains that can't be resolved or that the batch lookup rejects are
+    looked up one by one with locate_domain.
+    """
+    locations = [get_cached_location(domain) for domain in domains]
+    missing = [i for i, location in enumerate(locations) if location is None]
+    if not missing:
+        return locations
+    
+    addresses = await asyncio.gather(*(resolve_domain(domains[i]) for i in missing))
+    queries = {i: address for i, address in zip(missing, addresses) if address}
+    if queries:
+        try:
+            response = await app.state.client.post(
+                'http://ip-api.com/batch',
+                json=[{'query': address, 'fields': BATCH_FIELDS} for address in queries.values()]
+            )
+            if response.status_code == 200:
+                for i, data in zip(queries, response.json()):
+                    locations[i] = parse_location(data)
+                    cache_location(domains[i], locations[i])
+        except Exception as e:
+            logging.error(f"Error fetching locations for {len(queries)} domains: {str(e)}")
+    
+    # Fall back to single lookups, which also resolve hostnames on ip-api.com's side
+    failed = [i for i in missing if locations[i] is None]
+    for i, location in zip(failed, await asyncio.gather(*(locate_domain(domains[i]) for i in failed))):
+        locations[i] = location
+    return locations
+
 def get_domain(url):
     """Extract domain from URL."""
     parsed = urlparse(url)
     return parsed.netloc or parsed.path
 
-def get_locations(url):
-    """Get all locations for a URL."""
-    conn = sqlite3.connect(config['database']['path'])
-    cursor = conn.cursor()
-    cursor.execute('''
-    SELECT detected_at, geom_lat, geom_lon, country, city, isp, org, as_number FROM tracking WHERE url = ? ORDER BY detected_at ASC
-    ''', (url,))
-    return cursor.fetchall()
+# Domains of the tracked URLs, parsed once per config load
+DOMAINS = {url: get_domain(url) for url in config['urls']}
 
-async def track_urls_job():
-    """Scheduled job to track URLs."""
-    conn = sqlite3.connect(config['database']['path'])
+# Locations recorded for a URL, oldest first, rendered as a JSON array by sqlite.
+# The optional lower bound on detected_at is a range scan on idx_url_detected.
+_SELECT_LOCATIONS_TEMPLATE = '''
+SELECT json_group_array(json_object(
+    'detected_at', detected_at, 'geom_lat', geom_lat, 'geom_lon', geom_lon,
+    'country', country, 'city', city, 'isp', isp, 'org', org, 'as_number', as_number
+))
+FROM (
+    SELECT detected_at, geom_lat, geom_lon, country, city, isp, org, as_number
+    FROM tracking WHERE url = ?{since} ORDER BY detected_at ASC
+)
+'''
+SELECT_LOCATIONS_SQL = _SELECT_LOCATIONS_TEMPLATE.format(since='')
+SELECT_LOCATIONS_SINCE_SQL = _SELECT_LOCATIONS_TEMPLATE.format(since=' AND detected_at > ?')
+
+def get_locations(conn, url, since=None):
+    """Get locations for a URL as a JSON array string.
+
+    If since is given, only locations detected strictly after it are returned.
+    """
     cursor = conn.cursor()
+    if since is None:
+        cursor.execute(SELECT_LOCATIONS_SQL, (url,))
+    else:
+        # detected_at is stored as a naive local-time ISO string
+        if since.tzinfo is not None:
+            since = since.astimezone().replace(tzinfo=None)
+        cursor.execute(SELECT_LOCATIONS_SINCE_SQL, (url, since.isoformat()))
+    return cursor.fetchone()[0]
+
+# Insert a location, ignoring it if the exact location already exists
+INSERT_SQL = '''
+INSERT OR IGNORE INTO tracking (
+    url, detected_at, geom_lat, geom_lon,
+    country, city, isp, org, as_number, dedup_key
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Maximum number of rows handed to a single executemany call
+INSERT_BATCH_SIZE = 500
+
+# Insert a location, or move an existing one's detection back to an earlier time
+UPSERT_EARLIEST_SQL = '''
+INSERT INTO tracking (
+    url, detected_at, geom_lat, geom_lon,
+    country, city, isp, org, as_number, dedup_key
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(dedup_key) DO UPDATE SET detected_at = excluded.detected_at
+WHERE excluded.detected_at < tracking.detected_at
+'''
+
+def insert_rows(cursor, rows, sql=INSERT_SQL):
+    """Insert rows in batches of INSERT_BATCH_SIZE, returning the number inserted."""
+    inserted = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, INSERT_BATCH_SIZE)):
+        cursor.executemany(sql, batch)
+        inserted += cursor.rowcount
+    return inserted
+
+def flush_rows(conn, rows):
+    """Insert rows in a single transaction, returning the number inserted."""
+    with conn:
+        conn.execute('BEGIN')
+        return insert_rows(conn.cursor(), rows)
+
+# Columns of a bulk-load CSV, in INSERT_SQL order; empty fields load as NULL
+CSV_COLUMNS = (
+    'url', 'detected_at', 'geom_lat', 'geom_lon',
+    'country', 'city', 'isp', 'org', 'as_number'
+)
+
+def read_csv_rows(file):
+    """Yield tracking rows from a bulk-load CSV file."""
+    for record in csv.DictReader(file):
+        url, detected_at, lat, lon, *text = (record[column] or None for column in CSV_COLUMNS)
+        values = (
+            None if lat is None else float(lat),
+            None if lon is None else float(lon),
+            *text
+        )
+        yield (url, detected_at, *values, dedup_key(url, *values))
+
+def bulk_load(csv_path):
+    """Load tracking rows from a CSV file, building indexes after the load.
+
+    The CSV needs a header with the columns url, detected_at, geom_lat,
+    geom_lon, country, city, isp, org and as_number. Indexes are only dropped
+    and rebuilt when the table is empty; otherwise rows are merged through the
+    existing indexes. Duplicate locations keep their earliest detected_at.
+    Returns the number of rows added.
+    """
+    conn = connect()
+    migrate_schema(conn)
+    create_table(conn)
+    before = conn.execute('SELECT COUNT(*) FROM tracking').fetchone()[0]
     
-    urls = config['urls']
+    with open(csv_path, newline='') as file, conn:
+        conn.execute('BEGIN')
+        if before:
+            # Existing history: keep the indexes and let earlier CSV rows win
+            create_indexes(conn)
+            insert_rows(conn.cursor(), read_csv_rows(file), UPSERT_EARLIEST_SQL)
+        else:
+            # First import: load without index maintenance, then build indexes
+            drop_indexes(conn)
+            insert_rows(conn.cursor(), read_csv_rows(file))
+            conn.execute(DELETE_DUPLICATES_SQL)
+            create_indexes(conn)
+    
+    after = conn.execute('SELECT COUNT(*) FROM tracking').fetchone()[0]
+    conn.close()
+    logging.info(f"Bulk loaded {after - before} locations from {csv_path}")
+    return after - before
+
+# The writer flushes once it has WRITER_BATCH_SIZE rows or WRITER_FLUSH_INTERVAL
+# seconds have passed since the first queued row. Ticks are tracking_interval
+# apart, so with the default window a flush usually covers a single tick; only
+# fetches that finish close together share a commit. Raise
+# server.writer_flush_interval towards the tracking interval to combine ticks,
+# at the cost of writing rows later.
+WRITER_BATCH_SIZE = INSERT_BATCH_SIZE
+WRITER_FLUSH_INTERVAL = config['server'].get('writer_flush_interval', 0.5)
+
+async def db_writer_loop(queue):
+    """Write queued rows to the database in batches until a None sentinel arrives."""
+    loop = asyncio.get_running_loop()
+    done = False
+    while not done:
+        row = await queue.get()
+        if row is None:
+            break
+        rows = [row]
+        deadline = loop.time() + WRITER_FLUSH_INTERVAL
+        while len(rows) < WRITER_BATCH_SIZE:
+            try:
+                row = await asyncio.wait_for(queue.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+            if row is None:
+                done = True
+                break
+            rows.append(row)
+        
+        # Insert new locations in a single transaction, ignoring exact duplicates
+        try:
+            inserted = await asyncio.to_thread(flush_rows, app.state.db, rows)
+            logging.debug(f"Recorded {inserted} new locations out of {len(rows)}")
+        except Exception as e:
+            logging.error(f"Error writing {len(rows)} locations: {str(e)}")
+
+# Maximum number of fetches allowed to run at once; further ticks are skipped
+MAX_FETCHES = config['server'].get('max_fetches', 2)
+
+async def track_urls_job():
+    """Scheduled job to track URLs.
+
+    The fetch runs as a separate task so one slow tick doesn't block the next,
+    up to MAX_FETCHES overlapping fetches.
+    """
+    if len(app.state.fetches) >= MAX_FETCHES:
+        logging.warning(f"Skipping tracking tick, {len(app.state.fetches)} fetches still running")
+        return
+    task = asyncio.create_task(fetch_locations())
+    app.state.fetches.add(task)
+    task.add_done_callback(_fetch_done)
+
+def _fetch_done(task):
+    """Forget a finished fetch task, logging it if it failed."""
+    app.state.fetches.discard(task)
+    if not task.cancelled() and task.exception():
+        logging.error(f"Error tracking URLs: {str(task.exception())}")
+
+async def fetch_locations():
+    """Locate all tracked URLs and queue the rows for the database writer."""
+    urls = list(DOMAINS)
     logging.debug(f":Running job to track {len(urls)} URLs")
     for url in urls:
         logging.debug(f" - Tracking {url}")
     
-    for url in urls:
-        domain = get_domain(url)
-
-        logging.debug(f"Processing {domain}")
-        location = await locate_domain(domain)
-
+    # Resolve URLs in batches, running batches concurrently up to the configured
+    # limit, which is shared by overlapping fetches
+    domains = list(DOMAINS.values())
+    batches = [domains[i:i + BATCH_SIZE] for i in range(0, len(domains), BATCH_SIZE)]
+    
+    async def _one(batch):
+        async with app.state.fetch_sem:
+            logging.debug(f"Processing {len(batch)} domains")
+            return await locate_domains(batch)
+    
+    results = await asyncio.gather(*(_one(batch) for batch in batches))
+    locations = [location for batch in results for location in batch]
+    
+    # Collect rows for all located URLs
+    now = datetime.now().isoformat()
+    rows: list[tuple] = []
+    for url, domain, location in zip(urls, domains, locations):
         if not location:
             logging.warning(f"Could not get location for {domain}")
             continue
-    
-            
-        # Insert new location, ignoring if exact location already exists
-        cursor.execute('''
-        INSERT OR IGNORE INTO tracking (
-            url, detected_at, geom_lat, geom_lon,
-            country, city, isp, org, as_number
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            url, datetime.now().isoformat(), location['lat'], location['lon'],
+        values = (
+            location['lat'], location['lon'],
             location['country'], location['city'], location['isp'],
             location['org'], location['as']
-        ))
-        
-        if cursor.rowcount > 0:
-            logging.debug(f"New location recorded for {domain}")
-            conn.commit()
-        else:
-            logging.debug(f"Location unchanged for {domain}")
+        )
+        rows.append((url, now, *values, dedup_key(url, *values)))
     
-    conn.close()
+    # Hand rows to the database writer
+    for row in rows:
+        app.state.queue.put_nowait(row)
+    logging.debug(f"Queued {len(rows)} locations")
 
 @app.get("/")
 async def home(request: Request):
     """Render the home page with latest locations."""
-    # Initialize session for frontend
-    init_session(request)
     urls = config['urls']
-    return templates.TemplateResponse(
+    response = templates.TemplateResponse(
         "index.html",
         {
             "request": request,
             "urls": urls
         }
     )
+    # Initialize session for frontend
+    init_session(response)
+    return response
 
 @app.get("/map-trace")
 async def map_trace(request: Request, url: str = None):
@@ -227,13 +628,16 @@ async def map_trace(request: Request, url: str = None):
     )
 
 @app.get("/api/locations/{url:path}")
-async def get_url_locations(request: Request, url: str):
-    """API endpoint to get locations for a specific URL."""
+async def get_url_locations(request: Request, url: str, since: datetime | None = None):
+    """API endpoint to get locations for a specific URL.
+
+    Pass since (ISO 8601) to only fetch locations detected after that time.
+    """
     # Verify the request is from our frontend
     await verify_frontend_request(request)
     
-    locations = get_locations(url)
-    return locations
+    locations = await asyncio.to_thread(get_locations, request.app.state.read_db, url, since)
+    return Response(content=locations, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,31 +1,81 @@
 from fastapi import (
     HTTPException,
     Request,
+    Response,
     status,
 )
+from itsdangerous import BadSignature, TimestampSigner
 
+import os
 import secrets
-import yaml
+import time
+from pathlib import Path
+from src.config import load_config
 
 # Load config
-def load_config(config_file='config.yml'):
-    with open(config_file, 'r') as file:
-        return yaml.safe_load(file)
-
 config = load_config()
 
-# Generate a secure secret key if not in config
-if 'secret_key' not in config['server']:
-    config['server']['secret_key'] = secrets.token_urlsafe(32)
-    with open('config.yml', 'w') as file:
-        yaml.dump(config, file)
+def _read_key(path: Path, attempts: int = 50) -> str:
+    """Read the secret key from path, waiting while another worker writes it."""
+    for _ in range(attempts):
+        key = path.read_text().strip()
+        if key:
+            return key
+        time.sleep(0.1)
+    raise RuntimeError(f"Secret key file {path} is empty")
+
+def _write_new(path: Path, key: str) -> None:
+    """Write key to path, which must not exist yet; only the owner may read it."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w') as file:
+        file.write(key)
+
+def _load_or_create(path: Path) -> str:
+    """Read the secret key from path, creating it on first boot."""
+    if path.exists():
+        return _read_key(path)
+    path.parent.mkdir(parents=False, exist_ok=True)
+    key = secrets.token_urlsafe(32)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    _write_new(tmp, key)
+    try:
+        # Publish atomically; if another worker won the race, use its key
+        os.link(tmp, path)
+    except FileExistsError:
+        pass
+    except OSError:
+        # Filesystems without hard links: create the file exclusively so only
+        # one worker writes it; the others wait for its content below
+        try:
+            _write_new(path, key)
+        except FileExistsError:
+            pass
+    finally:
+        tmp.unlink(missing_ok=True)
+    return _read_key(path)
 
-SECRET_KEY = config['server']['secret_key']
+# Secret key from the environment, a legacy config entry, or the data directory
+SECRET_KEY = (
+    os.environ.get('URL_TRACKER_SECRET')
+    or config['server'].get('secret_key')
+    or _load_or_create(Path(config['database']['path']).parent / 'secret.key')
+)
+
+# Stateless session cookie: a timestamped signature valid for one hour
+SESSION_COOKIE = "session"
+SESSION_MAX_AGE = 3600  # 1 hour
+signer = TimestampSigner(SECRET_KEY)
 
 def verify_session(request: Request) -> bool:
     """Verify that the request comes from our frontend session."""
-    session = request.session
-    return session.get('authenticated', False)
+    token = request.cookies.get(SESSION_COOKIE)
+    if not token:
+        return False
+    try:
+        signer.unsign(token, max_age=SESSION_MAX_AGE)
+    except BadSignature:
+        return False
+    return True
 
 async def verify_frontend_request(request: Request) -> bool:
     """Dependency to verify frontend requests."""
@@ -36,6 +86,13 @@ async def verify_frontend_request(request: Request) -> bool:
         )
     return True
 
-def init_session(request: Request) -> None:
+def init_session(response: Response) -> None:
     """Initialize a new frontend session."""
-    request.session['authenticated'] = True 
\ No newline at end of file
+    response.set_cookie(
+        SESSION_COOKIE,
+        signer.sign(b'ok').decode(),
+        max_age=SESSION_MAX_AGE,
+        httponly=True,
+        samesite="strict",
+        secure=True
+    )